@@ -1,4 +1,6 @@
+import time
 import inspect
+import itertools
 import starstar
 from starstar import unpack
 
@@ -50,16 +52,23 @@ def time_unpack(n=N):
 
     data = {'a': 5, 'b': 6, 'x': 0, 'y': 1, 'z': 2}
 
+    consumed = frozenset({'a', 'b'})
+    extract = unpack.compile('a', 'b', '*c', b=0)
+
     def baseline():
         a, b, c = (
-            data.get('a'), data.get('b'), 
-            {k: data[k] for k in set(data) - {'b','a'}})
+            data.get('a'), data.get('b', 0), 
+            {k: v for k, v in data.items() if k not in consumed})
 
     def unpack_test():
         a, b, *(c,) = unpack(data, b=0, c=10)
 
-    dt = timed(baseline, n=n)
-    dt = timed(unpack_test, compare=dt, n=n)
+    def unpack_compiled():
+        a, b, c = extract(data)
+
+    dtbase = timed(baseline, n=n)
+    dt = timed(unpack_test, compare=dtbase, n=n)
+    dt = timed(unpack_compiled, compare=dtbase, n=n)
     
 
 
@@ -71,23 +80,27 @@ def heading(txt):
     print('*'*20)
 
 
-def timed(__func, compare=None, n=N, source=None, **kw):
-    import time
+def _measure_overhead(n=N):
+    '''Calculate the per-iteration overhead of the timing loop (in ns).'''
+    t0 = time.perf_counter_ns()
+    for _ in itertools.repeat(None, n): pass
+    return (time.perf_counter_ns() - t0) / n
 
-    # calculate the overhead of using this for loop
-    t0 = time.time()
-    for _ in range(N): pass
-    overhead = (time.time() - t0)/N
+_OVERHEAD_NS = _measure_overhead()
 
-    # get the 
-    t0 = time.time()
-    for _ in range(N):
+
+def timed(__func, compare=None, n=N, source=None, **kw):
+    # time the function, minus the overhead of the for loop
+    t0 = time.perf_counter_ns()
+    for _ in itertools.repeat(None, n):
         __func(**kw)
-    dt = (time.time() - t0 - overhead)/N
+    dt = ((time.perf_counter_ns() - t0) / n - _OVERHEAD_NS) / 1e9
 
+    if source is None:
+        source = inspect.getsource(__func)
     print('---')
     print(f'time for {__func.__name__} ({n} iters):')
-    print(source or inspect.getsource(__func))
+    print(source)
     print('===')
     print(f'{dt:.3g}s / iter', (f'({dt/compare:.3g}x slower)' if dt > compare else f'({compare/dt:.3g}x faster)') if compare else '')
     print('---')
@@ -95,7 +108,6 @@ def timed(__func, compare=None, n=N, source=None, **kw):
     return dt
 
 
-
 import pyinstrument
 
 with pyinstrument.Profiler() as p:
@@ -1,12 +1,13 @@
 import os
+import re
 import setuptools
 
 USERNAME = 'beasteers'
 NAME = 'starstar'
 
-import imp
-version = imp.load_source('{}.__version__'.format(NAME), os.path.join(os.path.dirname(__file__), NAME, '__version__.py'))
-version = version.__version__
+# read the version without importing/executing the package
+with open(os.path.join(os.path.dirname(__file__), NAME, '__version__.py'), encoding='utf-8') as f:
+    version = re.search(r'__version__\s*=\s*[\'"]([^\'"]+)', f.read()).group(1)
 
 setuptools.setup(
     name=NAME,
@@ -17,7 +18,8 @@ setuptools.setup(
     author='Bea Steers',
     author_email='bea.steers@gmail.com',
     url='https://github.com/{}/{}'.format(USERNAME, NAME),
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(include=[NAME, f'{NAME}.*']),
+    python_requires='>=3.7',
     # entry_points={'console_scripts': ['{name}={name}:main'.format(name=NAME)]},
     install_requires=[
         'docstring_parser',
@@ -1,7 +1,6 @@
 from .__version__ import __version__
 from .core import *
 from .defaults import *
-from .dcp_nesteddoc import *
 # needed for autodoc
 # from .core import (
 #     divide, 
@@ -17,4 +16,17 @@ from .dcp_nesteddoc import *
 #     unmatched_kw,
 #     args_matching,
 # )
-from .unpack import *
\ No newline at end of file
+from .unpack import *
+
+# these pull in docstring_parser, so only import them when they're used (PEP 562)
+_LAZY = {'nestdoc': 'dcp_nesteddoc'}
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = globals()[name] = getattr(importlib.import_module(f'.{_LAZY[name]}', __name__), name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -29,26 +29,55 @@ to write.
 
 '''
 from __future__ import annotations
-import copy
 import functools
 import os
-from typing import Any, Callable, Union, get_type_hints
+import re
+import sys
+from typing import Any, Callable, Union
 try:
     from typing import Literal, get_origin, get_args
 except ImportError:
     from typing_extensions import Literal, get_origin, get_args
+try:  # X | Y in python 3.10+
+    from types import UnionType
+except ImportError:
+    UnionType = Union
 import argparse
 import inspect
 import starstar
-from starstar import docstr, POS_ONLY, VAR_POS, VAR_KW, POS_KW
+from starstar import POS_ONLY, VAR_POS, VAR_KW, POS_KW, KW
 from starstar.parse import parse
 
-TYPE = type
+# starstar.docstr is only imported when a docstring is first parsed (PEP 562)
+def __getattr__(name):
+    if name == 'docstr':
+        from starstar import docstr
+        return docstr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# functools.cache is only available in 3.9+
+_cache = getattr(functools, 'cache', None) or functools.lru_cache(maxsize=None)
+
+def _cached(func=None, *, maxsize=None):
+    '''Memoize a function, but fall back to calling it directly for unhashable arguments.'''
+    if func is None:
+        return functools.partial(_cached, maxsize=maxsize)
+    cached = _cache(func) if maxsize is None else functools.lru_cache(maxsize=maxsize)(func)
+    @functools.wraps(func)
+    def inner(*a, **kw):
+        try:
+            hash((a, *kw.values()))
+        except TypeError:
+            return func(*a, **kw)
+        return cached(*a, **kw)
+    inner.cache_clear = cached.cache_clear
+    return inner
 
 # improved argparser with vararg parsing
 
 class ArgumentParser(argparse.ArgumentParser):
     accept_var_kw = False
+    _lazy = None  # (obj, kw) for subcommands that are built when they're first used (see from_any)
     def __init__(self, *a, **kw):
         # allow newlines in arguments
         kw.setdefault('formatter_class', argparse.RawDescriptionHelpFormatter)
@@ -60,26 +89,67 @@ class ArgumentParser(argparse.ArgumentParser):
             return self.parse_varkw_args(*a)
         return super().parse_args(*a)
 
-    def parse_varkw_args(self, *a):
-        '''Parse arguments and accept var kwargs if provided.'''
-        # support variable kwargs
-        parsed, unknown = self.parse_known_args(*a)
-        key = None
-        values = []
-        self2 = copy.copy(self)
-        for arg in unknown + [None]:  # type: ignore
-            if arg is None or arg.startswith(("-", "--")):
-                if key is not None:
-                    self2.add_argument(key, required=False, type=parse, default=argparse.SUPPRESS)
-                key = arg
-                values.clear()
+    def parse_varkw_args(self, args=None, namespace=None):
+        '''Parse arguments and accept var kwargs if provided.
+        
+        Unknown flags are found before parsing and looked up alongside the known ones, so their 
+        values aren't taken by positional arguments and argv is only parsed once. ``--key value`` 
+        is parsed as a single value (the last one wins if repeated), and a bare ``--key`` as ``True``.
+        '''
+        self._build_lazy()
+        args = sys.argv[1:] if args is None else list(args)
+        known = self._option_string_actions
+        extra = {}
+        for arg in args:
+            if arg == '--':
+                break
+            if not _is_flag(arg):
                 continue
-            values.append(arg)
-        return super(ArgumentParser, self2).parse_args(*a)
+            key = arg.split('=', 1)[0]
+            if key in extra or key in known or self._is_abbrev(key):
+                continue
+            extra[key] = argparse._StoreAction(
+                [key], key.lstrip('-').replace('-', '_'), nargs='?', const=True, 
+                type=parse, default=argparse.SUPPRESS)
+        if not extra:
+            return super().parse_args(args, namespace)
+
+        # (only the option lookup needs them - they're taken back out afterwards)
+        known.update(extra)
+        try:
+            return super().parse_args(args, namespace)
+        finally:
+            for key in extra:
+                del known[key]
+
+    def _is_abbrev(self, key):
+        '''Check if a flag would be matched to a known one by argparse (e.g. ``--ab`` for ``--abc``, or ``-x1``).'''
+        known = self._option_string_actions
+        if self.allow_abbrev and any(k.startswith(key) for k in known):
+            return True
+        return not key.startswith('--') and key[:2] in known
     
+    def parse_known_args(self, args=None, namespace=None):
+        self._build_lazy()
+        return super().parse_known_args(args, namespace)
+
+    def format_help(self):
+        self._build_lazy()
+        return super().format_help()
+
+    def _build_lazy(self):
+        '''Add a subcommand's arguments the first time it's actually used.'''
+        if self._lazy is not None:
+            (obj, kw), self._lazy = self._lazy, None
+            from_any(obj, parser=self, **kw)
+
     def print_usage(self, file=None):
         return self.print_help(file)
 
+def _is_flag(arg):
+    '''Check if a command line token is a flag (and not e.g. a negative number).'''
+    return arg.startswith('-') and not arg[1:2].isdigit() and arg[1:2] != '.'
+
 DESC_SEP = ': '
 
 def from_any(
@@ -105,6 +175,7 @@ def from_any(
     # subparsers = parser._subparsers
     # if subparsers is None:
     subparsers = parser.add_subparsers(dest=f'__{_cmd_prefix or parser_name or ""}command', help='Available commands.')
+    parser._command_map = subparsers._name_parser_map  # for call_any
     # FIXME: how to handle nested commands?
     
     # handle different object types
@@ -114,11 +185,17 @@ def from_any(
 
     obj_for_parser = obj
     if isinstance(obj, dict):
-        for name, obj_i in obj.items():
-            kwi = dict(kw)
-            if DESC_SEP in name:
-                name, kwi['description'] = name.split(DESC_SEP, 1)
-            from_any(obj_i, subparsers=subparsers, parser_name=name, _cmd_prefix=f'{_cmd_prefix or ""}__{name}', **kwi)
+        # only build the subcommands that get used (needs our parser class to do it)
+        lazy = issubclass(subparsers._parser_class, ArgumentParser)
+        for key, obj_i in obj.items():
+            name, desc = _split_desc(key)
+            kwi = dict(kw, parser_name=name, _cmd_prefix=f'{_cmd_prefix or ""}__{name}')
+            if desc is not None:
+                kwi['description'] = desc
+            if lazy:
+                _add_lazy_parser(subparsers, obj_i, **kwi)
+            else:
+                from_any(obj_i, subparsers=subparsers, **kwi)
     else:
         # parser = from_any(vars(obj), **kw)
         raise TypeError("Object must be a function or a dict of functions.")
@@ -126,6 +203,25 @@ def from_any(
     return parser
 
 
+@functools.lru_cache(maxsize=1024)
+def _split_desc(key):
+    '''Split a command key like ``"name: description"`` into ``(name, description)``.'''
+    name, sep, desc = key.partition(DESC_SEP)
+    return name, (desc if sep else None)
+
+
+def _add_lazy_parser(subparsers, obj, *, parser_name, description=None, docstyle=None, **kw):
+    '''Add a placeholder subparser, with the same help as ``from_any`` would give it.'''
+    if callable(obj) or isinstance(obj, type):
+        desc_str = _cached_docstr_parse(_func_docs(obj), docstyle)[0]
+        help_msg = description or desc_str.split('\n')[0]
+        parser = subparsers.add_parser(parser_name, help=help_msg or '', description=description or desc_str)
+    else:
+        parser = subparsers.add_parser(parser_name, help=description or '')
+    parser._lazy = (obj, dict(kw, parser_name=parser_name, description=description, docstyle=docstyle))
+    return parser
+
+
 def from_func(
         func: Callable, 
         *, 
@@ -153,20 +249,14 @@ def from_func(
 
     # handle class init
     cls = None
+    func_name = func.__name__
+    docs = _func_docs(func)
     if isinstance(func, type):
         cls = func
-        func_name = func.__name__
-        docs = func.__init__.__doc__ or func.__doc__
         func = func.__init__.__get__(func)  # FIXME: this is not right... this will break for some weirdo (I'm the kind of weirdo)
-    else:
-        func_name = func.__name__
-        docs = func.__doc__
 
     # parse docstring
-    docs = docstr.parse(docs, style=docstyle) or None
-    docargs = list(docs.children('args')) if docs else None
-    desc = docs.first('desc') if docs else None
-    desc_str = str(desc or '')
+    desc_str, doc_help = _cached_docstr_parse(docs, docstyle)
 
     # create parser if not provided
     if not parser:
@@ -183,55 +273,103 @@ def from_func(
     if prog:
         parser.prog = prog
 
-    # get signature
+    # get signature and type hints
     s = starstar.signature(func)
-
-    # fix union syntax and get type hints
-    type_hints = get_type_hints(TYPE(func_name, (object,), {'__annotations__': {
-        n: _repl_union(tstr) for n, tstr in dict(func.__annotations__).items()
-    }}))
+    type_hints = _cached_type_hints(func)
 
     # make any arguments before varargs positional only
-    before_var_pos = any(p.kind == VAR_POS for p in s.parameters.values())
+    params = s.parameters
+    i_var_pos = next((i for i, p in enumerate(params.values()) if p.kind is VAR_POS), -1)
 
     # create each parameter
-    for name, p in s.parameters.items():
-        if p.kind == VAR_POS:
-            before_var_pos = False
-        if p.kind == VAR_KW:
+    for i, (name, p) in enumerate(params.items()):
+        if p.kind is VAR_KW:
             # can't handle varkw in here (see parse_args)
             parser.accept_var_kw = True
             continue
 
         argnames, pkw = get_args_from_parameter(
             name, p, 
-            before_var_pos=before_var_pos,
+            before_var_pos=i < i_var_pos,
             type_hints=type_hints, 
-            doc_args=docargs, 
+            doc_help=doc_help, 
             env_format=env_format, 
             **(args_overrides.get(name) or {}))
         parser.add_argument(*argnames, **pkw)
     return parser
 
 
-def get_args_from_parameter(name, p, *, before_var_pos=None, type_hints=None, doc_args=None, env_format=None, **pkw):
-    flag_name = name
+def _func_docs(func):
+    '''Get the docstring for a function (or for a class's __init__).'''
+    if isinstance(func, type):
+        return func.__init__.__doc__ or func.__doc__
+    return func.__doc__
+
+
+@_cached(maxsize=256)
+def _cached_docstr_parse(docs, docstyle=None):
+    '''Parse a docstring, returning the description and the help message for each argument.
+    
+    This is cached by the docstring text, so building multiple parsers from the same 
+    function only parses the docstring once.
+    '''
+    if docs:
+        from starstar import docstr
+        docs = docstr.parse(docs, style=docstyle) or None
+    else:
+        docs = None
+    desc = docs.first('desc') if docs else None
+    desc_str = str(desc or '')
+    # get the help message for each argument
+    doc_help = {}
+    for darg in docs.children('args') if docs else ():
+        for dp in darg.body:
+            helpmsg = dp.get('desc')
+            if helpmsg and dp.name not in doc_help:
+                doc_help[dp.name] = str(helpmsg)
+    return desc_str, doc_help
+
+
+@_cached(maxsize=256)
+def _cached_type_hints(func):
+    '''Get the type hints for a function, converting ``X | Y`` to ``Union[X, Y]`` for older pythons.
+    
+    String annotations (forward refs) are evaluated in the function's own module, so 
+    they can refer to anything defined there.
+    '''
+    anns = getattr(func, '__annotations__', None) or {}
+    if not any(isinstance(t, str) or t is None for t in anns.values()):
+        return anns  # already evaluated - nothing to resolve
+    hints = dict(anns)
+    globalns = None
+    for n, t in hints.items():
+        if isinstance(t, str):
+            if globalns is None:
+                globalns = getattr(inspect.unwrap(func), '__globals__', {})
+            t = _repl_union(t)
+            try:  # (Union is provided in case the function's module didn't import it)
+                t = eval(t, globalns, {'Union': Union})
+            except NameError:  # e.g. typing names imported locally - try the ones we have
+                t = eval(t, globals())
+        hints[n] = type(None) if t is None else t
+    return hints
+
+
+def get_args_from_parameter(name, p, *, before_var_pos=None, type_hints=None, doc_help=None, env_format=None, **pkw):
+    flag_name = name.replace('_', '-') if '_' in name else name
 
     # check if the argument is positional
-    var_pos = p.kind == VAR_POS
-    pos_only = p.kind == POS_ONLY
-    pos_kw = p.kind == POS_KW
-    positional = var_pos or pos_only or (before_var_pos and pos_kw)
+    kind = p.kind  # (parameter kinds are enum singletons, so compare by identity)
+    var_pos = kind is VAR_POS
+    positional = var_pos or kind is POS_ONLY or (before_var_pos and kind is POS_KW)
 
     # var arg specifics: *a, **kw
     if var_pos:
         # allow 0 or more
-        if 'nargs' not in pkw:
-            pkw['nargs'] = '*'
+        pkw.setdefault('nargs', '*')
         # indicate that it gobbles up positional args
-        if 'metavar' not in pkw:
-            pkw['metavar'] = f'*{name}'
-    elif p.kind == VAR_KW:
+        pkw.setdefault('metavar', f'*{name}')
+    elif kind is VAR_KW:
         raise ValueError(f"Can't create arguments for **{name}.")
     
     # --------------------------------- Defaults --------------------------------- #
@@ -249,8 +387,8 @@ def get_args_from_parameter(name, p, *, before_var_pos=None, type_hints=None, do
             pkw['required'] = True
             pkw.pop('default', None)
     else:  # optional argument
-        if positional and 'nargs' not in pkw:
-            pkw['nargs'] = '?'
+        if positional:
+            pkw.setdefault('nargs', '?')
         pkw['default'] = default
 
     # -------------------------- Type specific settings -------------------------- #
@@ -263,25 +401,22 @@ def get_args_from_parameter(name, p, *, before_var_pos=None, type_hints=None, do
         if 'action' not in pkw:
             if default is True:  # flip flag from "--enable" to be "--no-enable"
                 pkw['action'] = 'store_false'
-                flag_name = f'no-{flag_name}'
+                flag_name = 'no-' + flag_name
             else:  # just a regular old boolean flag.
                 pkw['action'] = 'store_true'
 
     # allow variable argument lists for list/tuple type annotations
     if dtype and _lenient_subclass(dtype, (list, tuple)):# or 'default' in pkw and isinstance(pkw['default'], (list, tuple))
-        if 'action' not in pkw:
-            pkw['action'] = 'extend'
-        if 'nargs' not in pkw:
-            pkw['nargs'] = '+'
+        pkw.setdefault('action', 'extend')
+        pkw.setdefault('nargs', '+')
     # otherwise, parse then cast to type in order of specification (e.g. int|list will try int first then list).
     elif dtype and 'type' not in pkw:
         pkw['type'] = _parse_type_checker(dtype)
     # no type specific handling, just parse.
-    if 'type' not in pkw:
-        pkw['type'] = parse
+    pkw.setdefault('type', parse)
 
     # get choices from type hint - e.g. Literal["open", "closed", "ajar"]
-    if 'choices' not in pkw and dtype and get_origin(dtype) == Literal:
+    if 'choices' not in pkw and dtype is not None and get_origin(dtype) is Literal:
         pkw['choices'] = get_args(dtype)
 
     # manage constants
@@ -298,46 +433,176 @@ def get_args_from_parameter(name, p, *, before_var_pos=None, type_hints=None, do
     # ----------------------------------- Flags ---------------------------------- #
 
     # create flags
-    flag_name = flag_name.replace('_', '-')
-    if positional:
-        argnames = [flag_name]
-    else:
-        argnames = [f'-{flag_name}', f'--{flag_name}']
+    argnames = [flag_name] if positional else ['-' + flag_name, '--' + flag_name]
 
     # find the help message
-    dps = (dp for darg in doc_args or [] for dp in darg.body)
-    for dp in dps:
-        if dp.name == name:
-            helpmsg = dp.get('desc')
-            if helpmsg:
-                pkw['help'] = str(helpmsg)
-                break
+    if doc_help and name in doc_help:
+        pkw['help'] = doc_help[name]
     return argnames, pkw
 
+# fast path for simple functions
+
+FAST_TYPES = (int, float, str)
+
+class FastParser:
+    '''A lightweight stand-in for an ``ArgumentParser`` built by :func:`from_func_fast`.
+
+    It parses ``--key value`` / ``--key=value`` pairs directly into a namespace, and
+    hands anything it doesn't understand (e.g. ``--help``, unknown flags, bad values) 
+    to a full argparse parser so you get the same help and error messages. Any other 
+    attribute (e.g. ``format_help``, ``error``, ``add_argument``) is looked up on the 
+    full parser too.
+    '''
+    def __init__(self, func, casters, **kw):
+        self._calling_object = func
+        self.casters = casters
+        # the flag for each argument, spelled the way from_func adds it
+        self.flags = {'--' + name.replace('_', '-'): name for name in casters}
+        self.kw = kw
+        self._parser = None
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_parser':  # (e.g. before __init__ when copying)
+            raise AttributeError(name)
+        return getattr(self.parser, name)
+
+    @property
+    def parser(self):
+        '''The full argparse parser (built on first use).'''
+        if self._parser is None:
+            self._parser = from_func(self._calling_object, **self.kw)
+        return self._parser
+
+    def parse_args(self, args=None, namespace=None):
+        kw = self._parse(sys.argv[1:] if args is None else list(args))
+        if kw is None:  # let argparse sort it out
+            return self.parser.parse_args(args, namespace)
+        namespace = namespace if namespace is not None else argparse.Namespace()
+        for k, v in kw.items():
+            setattr(namespace, k, v)
+        return namespace
+
+    def _parse(self, argv):
+        casters, flags = self.casters, self.flags
+        params = starstar.signature(self._calling_object).parameters
+        kw = {}
+        it = iter(argv)
+        for arg in it:
+            key, eq, value = arg.partition('=')
+            name = flags.get(key)
+            if name is None:
+                return
+            if not eq:
+                value = next(it, None)
+                if value is None or _is_flag(value):
+                    return
+            try:
+                kw[name] = casters[name](value)
+            except (TypeError, ValueError):
+                return
+        for name in casters:
+            if name not in kw:
+                default = params[name].default
+                if default is inspect._empty:  # missing required argument
+                    return
+                # argparse also runs string defaults through the type
+                kw[name] = casters[name](default) if isinstance(default, str) else default
+        return kw
+
+    def print_help(self, file=None):
+        return self.parser.print_help(file)
+
+
+def from_func_fast(func: Callable, **kw):
+    '''Create a parser for a function, skipping argparse for simple functions.
+
+    If the function only takes keyword arguments annotated as ``int``, ``float``, 
+    ``str`` (or not annotated), this returns a :class:`FastParser` which parses 
+    ``--key value`` pairs without building an argparse parser. Otherwise, (or if
+    you pass ``parser``, ``subparsers``, ``args``, or ``env_format``) this is the 
+    same as :func:`from_func`.
+
+    .. code-block:: python
+
+        def main(*, lr: float=1e-3, name='model'):
+            ...
+
+        parser = starstar.argparse.from_func_fast(main)
+        args = parser.parse_args(['--lr', '0.1'])
+        assert vars(args) == {'lr': 0.1, 'name': 'model'}
+    '''
+    casters = None
+    if not any(kw.get(k) for k in ('parser', 'subparsers', 'args', 'env_format')):
+        casters = _fast_casters(func)
+    if casters is None:
+        return from_func(func, **kw)
+    return FastParser(func, casters, **kw)
+
+
+@_cached(maxsize=256)
+def _fast_casters(func):
+    '''Get the value parser for each argument, or None if the function isn't simple enough.'''
+    if isinstance(func, type):
+        return
+    type_hints = _cached_type_hints(func)
+    casters = {}
+    for name, p in starstar.signature(func).parameters.items():
+        if p.kind not in KW:
+            return
+        dtype = type_hints.get(name)
+        if dtype is not None and dtype not in FAST_TYPES:
+            return
+        casters[name] = _parse_type_checker(dtype) if dtype is not None else parse
+    return casters
+
+
 # type checkers
 
+@_cached
+def _classify(type):
+    '''Check if a type is a union and get its member types: ``(is_union, args)``.'''
+    origin = get_origin(type)
+    is_union = origin is Union or origin is UnionType
+    return is_union, (get_args(type) if is_union else ())
+
+@_cached
 def _lenient_subclass(obj, cls, union_cond=all):
     '''Check isinstance/subclass including unions.'''
-    if get_origin(obj) == Union:
-        return union_cond(t is None or t is type(None) or _lenient_subclass(t, cls) for t in get_args(obj))
+    is_union, args = _classify(obj)
+    if is_union:
+        return union_cond(t is None or t is type(None) or _lenient_subclass(t, cls) for t in args)
     return isinstance(obj, cls) or isinstance(obj, type) and issubclass(obj, cls)
 
-def _type_check(type, x):
-    '''Cast union type'''
-    if get_origin(type) == Union:
-        for t in get_args(type):
-            try:
-                return _type_check(t, x)
-            except Exception:
-                pass
-        raise TypeError(f"{x} could not be cast to {type}")
-    return type(x)
+@_cached
+def _type_casters(type):
+    '''Flatten a type into the casters to try, in order (e.g. int|list -> (int, list)).'''
+    is_union, args = _classify(type)
+    if is_union:
+        return tuple(c for t in args for c in _type_casters(t))
+    if get_origin(type) is Literal:  # the values are checked using choices
+        return (_identity,)
+    return (type,)
+
+def _identity(x):
+    return x
 
+@_cached
 def _parse_type_checker(type):
-    @functools.wraps(type)
-    def __type(x): return _type_check(type, parse(x))
-    if __type.__name__ == '__type':
-        __type.__name__ = __type.__qualname__ = _type_check_name(type)
+    casters = _type_casters(type)
+    if len(casters) == 1:
+        cast, = casters
+        def __type(x): return cast(parse(x))
+    else:  # try each type in the union - the casters are resolved once, not for every value
+        def __type(x):
+            x = parse(x)
+            for cast in casters:
+                try:
+                    return cast(x)
+                except Exception:
+                    pass
+            raise TypeError(f"{x} could not be cast to {type}")
+    # argparse uses the name in error messages
+    __type.__name__ = __type.__qualname__ = _type_check_name(type)
     return __type
 
 # def _type_checker(type):
@@ -348,11 +613,19 @@ def _parse_type_checker(type):
 #         __type.__name__ = __type.__qualname__ = _type_check_name(type)
 #     return __type
 
+@_cached
 def _type_check_name(type):
     '''Get the name of a type check (including unions)'''
-    if get_origin(type) == Union:
-        return '|'.join([_type_check_name(t) for t in get_args(type)])
-    return type.__name__
+    names = []
+    stack = [type]
+    while stack:
+        t = stack.pop()
+        is_union, args = _classify(t)
+        if is_union:
+            stack.extend(reversed(args))
+        else:
+            names.append(getattr(t, '__name__', None) or str(t))
+    return '|'.join(names)
 
 
 
@@ -363,62 +636,48 @@ OPEN_BRACKET = '['
 CLOSE_BRACKET = ']'
 COMMA = ','
 OR = '|'
+# brackets/commas/pipes, string literals (e.g. Literal['a|b']), and names. Whitespace is skipped.
+_UNION_TOKENS = re.compile(r'''[\[\],|]|'[^']*'|"[^"]*"|[^\[\],|\s'"]+|['"]''')
 
 
+@functools.lru_cache(maxsize=1024)
 def _repl_union(s: str):
-    """ Replace PEP 604-style annotations (i.e. like `X | Y`) with `Union[X, Y]`."""
+    """ Replace PEP 604-style annotations (i.e. like `X | Y`) with `Union[X, Y]`.
+    
+    This is done in a single pass over the string's tokens, keeping a stack of the bracketed 
+    expressions that we're currently inside of. Each expression is a list of comma 
+    separated items, and each item is a list of pipe separated types.
+    """
     # If there is no '|' character in the annotation part, we just return it.
     if OR not in s:
         return s
-    s = s.replace(' ', '')
-
-    # Checking for brackets like `List[int | str]`.
-    if OPEN_BRACKET in s:
-        # Get any indices of COMMA or OR outside a braced expression.
-        outer_commas, outer_pipes = _outer_comma_and_pipe_indices(s)
-        # commas outside bracket? e.g. dict[str | int, str]***,*** value[test]
-        if outer_commas:
-            return COMMA.join([_repl_union(i) for i in _sub_strings(s, outer_commas)])
-        # pipes outside bracket? e.g.: value | dict[str | int, list[int | str]]
-        if outer_pipes:
-            return f'Union{OPEN_BRACKET}{COMMA.join([_repl_union(i) for i in _sub_strings(s, outer_pipes)])}{CLOSE_BRACKET}'
-
-        # no outer commas/pipes, and `SomeType[str][bool]` is  invalid
-        # Replace inside brackets, e.g.: dict[str | int, str]
-        first_start_bracket = s.index(OPEN_BRACKET)
-        last_end_bracket = s.rindex(CLOSE_BRACKET)
-        return (
-            f'{s[:first_start_bracket]}{OPEN_BRACKET}'
-            f'{_repl_union(s[first_start_bracket + 1:last_end_bracket])}'
-            f'{CLOSE_BRACKET}{s[last_end_bracket + 1:]}')
-
-    elif COMMA in s:  #  e.g. `int | str, float | None`
-        return COMMA.join([_repl_union(i) for i in s.split(COMMA)])
-
-    return f'Union{OPEN_BRACKET}{s.replace(OR, COMMA)}{CLOSE_BRACKET}'  # e.g. `int | str`
-
-
-def _sub_strings(s: str, split_indices):
-    """Split a string on the specified indices, and return the split parts."""
-    prev = -1
-    for idx in split_indices:
-        yield s[prev+1:idx]
-        prev = idx
-    yield s[prev+1:]
-
-
-def _outer_comma_and_pipe_indices(s: str):
-    """Return any indices of ',' and '|' that are outside of braces."""
-    indices = {OR: [], COMMA: []}
-    brace_dict = {OPEN_BRACKET: 1, CLOSE_BRACKET: -1}
-    brace_count = 0
-
-    for i, char in enumerate(s):
-        if char in brace_dict:
-            brace_count += brace_dict[char]
-        elif not brace_count and char in indices:
-            indices[char].append(i)
-    return indices[COMMA], indices[OR]
+
+    stack = [[['']]]
+    for tok in _UNION_TOKENS.findall(s):
+        items = stack[-1]
+        if tok == OPEN_BRACKET:  # e.g. dict[ ...
+            stack.append([['']])
+        elif tok == CLOSE_BRACKET:  # ... ] - render the expression into the enclosing type
+            if len(stack) < 2:
+                return s  # unbalanced - let eval complain about it
+            inner = _join_union(stack.pop())
+            stack[-1][-1][-1] += f'{OPEN_BRACKET}{inner}{CLOSE_BRACKET}'
+        elif tok == COMMA:  # e.g. dict[str | int, ...
+            items.append([''])
+        elif tok == OR:  # e.g. int | ...
+            items[-1].append('')
+        else:  # a type name or string literal
+            items[-1][-1] += tok
+    if len(stack) != 1:
+        return s
+    return _join_union(stack[0])
+
+
+def _join_union(items):
+    """Render a list of comma separated items, each being a list of pipe separated types."""
+    return COMMA.join(
+        f'Union{OPEN_BRACKET}{COMMA.join(types)}{CLOSE_BRACKET}' if len(types) > 1 else types[0]
+        for types in items)
 
 
 
@@ -434,11 +693,14 @@ def call_any(parser, args, _cmd_prefix=''):
     if cmd is not None:
         # from IPython import embed
         # embed()
-        return call_any(next(
-            a._name_parser_map[cmd]
-            for a in parser._subparsers._group_actions
-            if cmd in a._name_parser_map
-        ), a, _cmd_prefix=f'{_cmd_prefix}__{cmd}')
+        try:
+            subparser = parser._command_map[cmd]
+        except (AttributeError, KeyError):  # subparsers added some other way
+            subparser = next(
+                a._name_parser_map[cmd]
+                for a in parser._subparsers._group_actions
+                if cmd in a._name_parser_map)
+        return call_any(subparser, a, _cmd_prefix=f'{_cmd_prefix}__{cmd}')
     
     # no more sub-commands
     try:
@@ -1,8 +1,8 @@
 from __future__ import annotations
 import os
 import inspect
-from types import MappingProxyType
-from typing import Callable, Iterable, cast as tcast
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, cast as tcast
 from inspect import signature as _builtin_signature, Signature as _Signature
 from functools import wraps as _builtin_wraps, update_wrapper as _update_wrapper
 
@@ -13,10 +13,10 @@ POS_KW = inspect.Parameter.POSITIONAL_OR_KEYWORD
 VAR_POS = inspect.Parameter.VAR_POSITIONAL
 VAR_KW = inspect.Parameter.VAR_KEYWORD
 
-ALL = {POS_ONLY, KW_ONLY, POS_KW, VAR_POS, VAR_KW}
-POS = {POS_ONLY, POS_KW}
-KW = {POS_KW, KW_ONLY}
-VAR = {VAR_POS, VAR_KW}
+ALL = frozenset({POS_ONLY, KW_ONLY, POS_KW, VAR_POS, VAR_KW})
+POS = frozenset({POS_ONLY, POS_KW})
+KW = frozenset({POS_KW, KW_ONLY})
+VAR = frozenset({VAR_POS, VAR_KW})
 
 NAMED = ALL - VAR
 NOT_KW = ALL - KW
@@ -87,23 +87,23 @@ def divide(kw: dict, *funcs: Callable|Iterable[Callable], mode='strict', varkw:
         main(a=1, x=2)  # extra argument "x"
         # gets put in ``kw_extra``
     '''
-    pss = [_nested_cached_sig_params(f) for f in funcs]
-    kws = [{} for _ in pss]
+    digests = [_digest(f) for f in funcs]
+    kws = []
 
     # get all keys that match explicitly defined parameters
-    kwunused = dict(kw)
-    for ps, kwi in zip(pss, kws):
-        for name in ps:
-            if ps[name].kind in NOT_KW or name not in kw:
-                continue
-            kwi[name] = kw[name]
-            kwunused.pop(name, None)
+    used = set()
+    for d in digests:
+        names = d.kw_names
+        kwi = {k: v for k, v in kw.items() if k in names}  # (keep the caller's order)
+        kws.append(kwi)
+        used.update(kwi)
+    kwunused = {k: v for k, v in kw.items() if k not in used} if len(used) < len(kw) else {}
 
     # check functions for varkw
     if kwunused and varkw:
         found_varkw = False
-        for ps, kwi in zip(pss, kws):
-            if any(p.kind == VAR_KW for p in ps.values()):
+        for d, kwi in zip(digests, kws):
+            if d.varkw:
                 kwi.update(kwunused)
                 found_varkw = True
                 if varkw == 'first':
@@ -121,20 +121,45 @@ def divide(kw: dict, *funcs: Callable|Iterable[Callable], mode='strict', varkw:
     return kws
 
 
-def _nested_cached_sig_params(f: Callable|list|tuple) -> dict|MappingProxyType:
-    '''Get and merge signature parameters for potentially multiple functions.'''
-    # return signature(f).parameters
-    # return {k: p for fi in _nested(f) for k, p in signature(fi).parameters.items()}
-    if isinstance(f, (list, tuple)):
-        return {k: v for fi in f for k, v in signature(fi).parameters.items()}
-    return signature(f).parameters
-
 def _nested(xs, types=(tuple, list)):
-    if isinstance(xs, types):
-        yield from (xi for x in xs for xi in _nested(x))
-    else:
-        yield xs
+    '''Flatten (nested) groups of functions, in order.'''
+    stack = [xs]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, types):
+            stack.extend(reversed(x))
+        else:
+            yield x
+
+def _flat_sigs(fs) -> list:
+    '''Get the signature of each function in a (nested) group.'''
+    return [signature(f) for f in _nested(fs)]
+
+def _id_cached(cache: OrderedDict, maxsize=256):
+    '''Cache (LRU) a function of some objects on their identity (plus any other hashable arguments).
+
+    Each entry holds a reference to the objects, so their ids can't be reused while it's cached.
+    '''
+    def decorator(func):
+        @_builtin_wraps(func)
+        def inner(objs, *a):
+            key = (tuple(map(id, objs)), *a)
+            try:
+                result = cache[key][1]
+                cache.move_to_end(key)
+                return result
+            except KeyError:
+                pass
+            result = func(objs, *a)
+            cache[key] = (objs, result)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+        return inner
+    return decorator
+
 
+_NO_SIG_CACHE = set()  # types that we can't cache signatures on
 
 def signature(f: Callable, required=True) -> _Signature:  # type: ignore
     '''Get a function signature.
@@ -142,22 +167,115 @@ def signature(f: Callable, required=True) -> _Signature:  # type: ignore
     Faster than inspect.signature (after the first call) because it 
     is cached using the standard ``f.__signature__`` attribute.
     '''
+    try:  # (a plain attribute lookup is the cheapest hit path - try blocks are free when nothing is raised)
+        return f.__signature__
+    except AttributeError:
+        pass
     try:
-        try:
-            return f.__signature__
-        except AttributeError:
-            s = tcast(_Signature, _builtin_signature(f))
-            try:
-                f.__signature__ = s
-            except AttributeError:
-                try:
-                    f.__dict__['__signature__'] = s
-                except AttributeError:
-                    pass
-            return s
+        s = tcast(_Signature, _builtin_signature(f))
     except ValueError:
         if required:
             raise
+        return None
+    t = type(f)
+    if t not in _NO_SIG_CACHE:
+        try:
+            f.__signature__ = s
+        except (AttributeError, TypeError):  # (TypeError: builtin classes are immutable)
+            try:
+                f.__dict__['__signature__'] = s
+            except (AttributeError, TypeError):  # e.g. builtins - don't bother next time
+                if t is not type:  # (user classes are fine)
+                    _NO_SIG_CACHE.add(t)
+    return s
+
+class _ParamDigest(NamedTuple):
+    '''A function's parameter names, grouped the way divide/filter_kw/as_args_kwargs use them.'''
+    sig: _Signature|None  # the signature this was computed from
+    kw_names: frozenset   # parameters that can be passed by keyword
+    varkw: bool           # whether it takes **kw
+    pos_names: tuple      # parameters that can be passed positionally, in order
+    var_pos: str|None     # the name of *args, if any
+    groups: tuple         # the parameters by kind: (positional, *args, keyword only, **kw)
+    params: tuple         # all parameters, in order
+
+_GROUP_INDEX = {POS_ONLY: 0, POS_KW: 0, VAR_POS: 1, KW_ONLY: 2, VAR_KW: 3}
+
+def _make_digest(sig, params) -> _ParamDigest:
+    kw_names, pos_names, varkw, var_pos = set(), [], False, None
+    groups = ([], [], [], [])
+    for p in params:
+        kind = p.kind
+        groups[_GROUP_INDEX[kind]].append(p)
+        if kind is POS_KW or kind is KW_ONLY:
+            kw_names.add(p.name)
+        if kind is POS_KW or kind is POS_ONLY:
+            pos_names.append(p.name)
+        elif kind is VAR_POS:
+            var_pos = p.name
+        elif kind is VAR_KW:
+            varkw = True
+    return _ParamDigest(
+        sig, frozenset(kw_names), varkw, tuple(pos_names), var_pos, 
+        tuple(tuple(g) for g in groups), tuple(p for g in groups for p in g))
+
+def _digest(f: Callable|list|tuple) -> _ParamDigest:
+    '''Get a function's parameters grouped by kind. 
+    
+    This is cached on ``f.__starstar_digest__`` (like ``signature()``) and is 
+    recomputed if the function's signature gets replaced.
+    '''
+    if isinstance(f, (list, tuple)):
+        return _group_digest(_flat_sigs(f))
+    sig = signature(f)
+    d = getattr(f, '__starstar_digest__', None)
+    if d is None or d.sig is not sig:
+        d = _make_digest(sig, sig.parameters.values())
+        try:
+            f.__starstar_digest__ = d
+        except AttributeError:
+            pass
+    return d
+
+_GROUP_DIGESTS: OrderedDict = OrderedDict()
+
+@_id_cached(_GROUP_DIGESTS)
+def _group_digest(sigs: list) -> _ParamDigest:
+    '''Get the merged digest for a (nested) group of functions' signatures.
+    
+    Lists can't hold attributes, so this is cached on the identity of each 
+    function's signature instead, which also follows any change to their signatures.
+    '''
+    params = {}
+    for sig in sigs:
+        params.update(sig.parameters)
+    return _make_digest(None, params.values())
+
+
+_TRACETO_CACHE: OrderedDict = OrderedDict()
+
+@_id_cached(_TRACETO_CACHE)
+def _traceto_params(sigs: list, keep_varkw=None, filter_hidden=True):
+    '''Get the merged keyword only parameters that ``traceto`` adds. 
+    
+    The result is cached for repeated ``traceto(same_funcs...)`` calls. The cache is keyed on 
+    the identity of each (grouped) function's signature, so it follows any change to their signatures.
+    Merging a group gives the same parameters as concatenating its members, so groups are just flattened.
+    '''
+    ps_all = [p for sig in sigs for p in sig.parameters.values()]
+    if keep_varkw is None:  # check if any have varkw
+        keep_varkw = any(p.kind == VAR_KW for p in ps_all)
+
+    # remove private parameters (start with '_')
+    if filter_hidden:
+        ps_all = [p for p in ps_all if not p.name.startswith('_')]
+    # remove duplicates
+    ps = {p.name: p for p in ps_all if p.kind not in NOT_KW}
+    # make the parameters kwonly
+    other_ps = tuple(p.replace(kind=KW_ONLY) for p in ps.values())# if kw_only else tuple(ps.values())
+
+    return other_ps, keep_varkw
+
 
 def traceto(*funcs: Callable, keep_varkw=None, filter_hidden=True, doc=False) -> Callable:  # , kw_only=True
     '''Tell a function where its ``**kwargs`` are going!
@@ -209,19 +327,7 @@ def traceto(*funcs: Callable, keep_varkw=None, filter_hidden=True, doc=False) ->
                 func_c(1, 2)  # should func_b get b=2 ???
                 # if not, how can I pass b=2 to func_b ?
     '''
-    # get parameters from source functions
-    f_params = [_nested_cached_sig_params(f) for f in funcs]
-    ps_all = [p for ps in f_params for p in ps.values()]
-    if keep_varkw is None:  # check if any have varkw
-        keep_varkw = any(p.kind == VAR_KW for p in ps_all)
-
-    # remove private parameters (start with '_')
-    if filter_hidden:
-        ps_all = [p for p in ps_all if not p.name.startswith('_')]
-    # remove duplicates
-    ps = {p.name: p for p in ps_all if p.kind not in NOT_KW}
-    # make the parameters kwonly
-    other_ps = [p.replace(kind=KW_ONLY) for p in ps.values()]# if kw_only else list(ps.values())
+    other_ps, keep_varkw = _traceto_params(_flat_sigs(funcs), keep_varkw, filter_hidden)
 
     def decorator(func):
         # copy func
@@ -231,18 +337,25 @@ def traceto(*funcs: Callable, keep_varkw=None, filter_hidden=True, doc=False) ->
 
         # get signature from the decorated function
         sig = signature(f)
-        params = tuple(sig.parameters.values())
-        p_poskw = [p for p in params if p.kind in (POS_ONLY, POS_KW, VAR_POS, KW_ONLY)]
-        p_varkw = [p for p in params if p.kind == VAR_KW]
-        p_names = {p.name for p in params if p.kind not in VAR}
-        other_ps_ = [p for p in other_ps if p.name not in p_names]
+        p_poskw, p_varkw, p_names = [], [], set()
+        for p in sig.parameters.values():
+            kind = p.kind
+            if kind is VAR_KW:
+                p_varkw.append(p)
+                continue
+            p_poskw.append(p)
+            if kind is not VAR_POS:
+                p_names.add(p.name)
+        other_ps_ = tuple(p for p in other_ps if p.name not in p_names)
 
         if doc:
+            from .dcp_nesteddoc import _mergedoc  # circular, and pulls in docstring_parser
             f.__doc__ = _mergedoc(f.__doc__, funcs, other_ps_) #MergedDocstring(f.__doc__, funcs, other_ps_)
 
         # merge parameters and replace the signature
-        f.__signature__ = sig.replace(parameters=(
-            p_poskw + other_ps_ + (p_varkw if keep_varkw else [])))
+        f.__signature__ = sig = sig.replace(parameters=(
+            *p_poskw, *other_ps_, *(p_varkw if keep_varkw else ())))
+        f.__starstar_digest__ = _make_digest(sig, sig.parameters.values())
         f.__starstar_traceto__ = funcs
         return f
     return decorator
@@ -304,29 +417,23 @@ def wraps(func: Callable, skip_args=(), skip_n=0) -> Callable:
         f.__signature__ = sig
         return f
     return decorator
-# wraps.__doc__ += '\n\n\n' + _builtin_wraps.__doc__
 
 
 def _merge_signature(wrapper, wrapped, skip_args=(), skip_n=0):
     '''Merge the signatures of a wrapper and its wrapped function.'''
-    sig = signature(wrapped)
-    sig_wrap = signature(wrapper)
-    psposkw, psvarpos, pskw, psvarkw = _param_groups(sig, skip_args)
-    pswposkw, _, pswkw, _ = _param_groups(sig_wrap)
-    return sig.replace(parameters=(
+    d = _digest(wrapped)
+    psposkw, psvarpos, pskw, psvarkw = _param_groups(d.sig, skip_args) if skip_args else d.groups
+    pswposkw, _, pswkw, _ = _digest(wrapper).groups
+    return d.sig.replace(parameters=(
         pswposkw + psposkw[skip_n or 0:] + psvarpos + pswkw + pskw + psvarkw))
 
 def _param_groups(sig, skip_args=()):
     '''Return the parameters by their kind. Useful for interleaving.'''
-    params = tuple(sig.parameters.values())
+    params = sig.parameters.values()
     if skip_args:
         skip_args = asitems(skip_args)
         params = [p for p in params if p.name not in skip_args]
-    return (
-        [p for p in params if p.kind in (POS_ONLY, POS_KW)],
-        [p for p in params if p.kind == VAR_POS],
-        [p for p in params if p.kind == KW_ONLY],
-        [p for p in params if p.kind == VAR_KW])
+    return _make_digest(sig, params).groups
 
 
 def partial(__func, *a_def, **kw_def):
@@ -334,10 +441,13 @@ def partial(__func, *a_def, **kw_def):
     
     known bug: kw defaults dont update in signature.
     '''
-    @wraps(__func, skip_n=len(a_def))
-    def inner(*a, **kw):
-        return __func(*a_def, *a, **{**kw_def, **kw})
-    return inner
+    if kw_def:
+        def inner(*a, **kw):
+            return __func(*a_def, *a, **{**kw_def, **kw})
+    else:  # nothing to merge
+        def inner(*a, **kw):
+            return __func(*a_def, *a, **kw)
+    return wraps(__func, skip_n=len(a_def))(inner)
 
 # given signature and dict, produce *a, **kw
 
@@ -373,17 +483,17 @@ def as_args_kwargs(func, kw):
         assert func_a(*a, **kw) == (1, 2, 3, 4)
         
     '''
-    sig = signature(func)
+    d = _digest(func)
     pos = []
     kw = dict(kw)
-    for name, arg in sig.parameters.items():
-        if arg.kind == VAR_POS:
-            pos.extend(kw.pop(arg.name, ()))
-            pos.extend(kw.pop('*', ()))
-            break
-        if arg.kind not in (POS_ONLY, POS_KW) or name not in kw:
+    for name in d.pos_names:
+        if name not in kw:
             break
         pos.append(kw.pop(name))
+    else:  # all positional arguments were given, so *args can be too
+        if d.var_pos is not None:
+            pos.extend(kw.pop(d.var_pos, ()))
+            pos.extend(kw.pop('*', ()))
     return pos, kw
 
 # get arguments matching a condition
@@ -425,15 +535,18 @@ def get_args(func, match=(), ignore=()):
         args = starstar.get_args(func, ignore=starstar.KW_ONLY)
         assert [p.name for p in args] == ['z']
     '''
+    params = _digest(func).params
+    if not match and not ignore:
+        return list(params)
     match = (set(asitems(match)) or ALL) - set(asitems(ignore))
-    return [p for p in signature(func).parameters.values() if p.kind in match]
+    return [p for p in params if p.kind in match]
 
 # get required arguments
 
 def required_args(func):
     '''Get the required arguments for a function.'''
     return [
-        p for p in signature(func).parameters.values() 
+        p for p in _digest(func).params
         if p.default is inspect._empty and p.kind not in VAR
     ]
 
@@ -461,10 +574,22 @@ def filter_kw(func, kw, skip_n=0, pop=False, inverse=False, unmatched=False, inc
         args = {'b': 2, 'c': 3, 'x': 1, 'y': 2}
         assert starstar.filter_kw(func_a, args) == {'b': 2, 'c': 3}
     '''
-    ps = list(signature(func).parameters.values())[skip_n or 0:]
-    varkw = include_varkw and next((True for p in ps if p.kind == VAR_KW), False)
-    ks = set(kw)
-    ps = {p.name for p in ps if p.kind in KW}
+    if not (skip_n or pop or inverse or unmatched) and include_varkw:  # the common case
+        d = _digest(func)
+        if d.varkw:
+            return dict(kw)
+        names = d.kw_names
+        return {k: v for k, v in kw.items() if k in names}  # (keep the caller's order)
+
+    if skip_n:
+        ps = list(signature(func).parameters.values())[skip_n:]
+        varkw = include_varkw and next((True for p in ps if p.kind == VAR_KW), False)
+        ps = {p.name for p in ps if p.kind in KW}
+    else:
+        d = _digest(func)
+        varkw = include_varkw and d.varkw
+        ps = d.kw_names
+    ks = kw.keys()  # (key views support set operations directly)
     if varkw:
         ps = ps|ks
     if unmatched:
@@ -511,12 +636,17 @@ def kw2id(kw, *keys, key=True, sep='-', key_sep='_', filter=True, missing='', fo
         assert starstar.kw2id(kw, 'name', 'count', 'enabled', 'xxx') == 'name_asdf-count_10-enabled_True'
         assert starstar.kw2id(kw, 'name', 'xxx', 'count', filter=False) == 'name_asdf-xxx_-count_10'
     '''
-    ki = ((k, kw.get(k, missing)) for k in keys if not filter or k in kw)
-    return sep.join(f'{k}{key_sep}{format(i)}' if key else f'{i}' for k, i in ki)
+    if filter:
+        ki = [(k, kw[k]) for k in keys if k in kw]
+    else:
+        ki = [(k, kw.get(k, missing)) for k in keys]
+    if key:
+        return sep.join([f'{k}{key_sep}{format(i)}' for k, i in ki])
+    return sep.join([f'{i}' for _, i in ki])
 
 
 
-def asitems(x, types=(list, tuple, set)):
+def asitems(x, types=(list, tuple, set, frozenset)):
     '''Convert a value into a list/tuple/set. Useful for arguments that can be ``None, single item, list, tuple``.
 
     .. code-block:: python
@@ -525,6 +655,8 @@ def asitems(x, types=(list, tuple, set)):
         assert starstar.asitems('asdf') == ['asdf']
         assert starstar.asitems([1, 2, 3]) == [1, 2, 3]
     '''
+    if type(x) in types:  # exact match - skip the subclass checks
+        return x
     return x if isinstance(x, types) else (x,) if x is not None else ()
 
 
@@ -545,7 +677,3 @@ def args_from_env_vars(func, prefix='', *, include_varkw=False, mapper=str.upper
                 names[inv_mapper(k.removeprefix(prefix))] = k
 
     return {n: os.environ[k] for n, k in names.items() if k in os.environ}
-
-
-
-from .dcp_nesteddoc import _mergedoc #  circular
\ No newline at end of file
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import inspect
 from functools import update_wrapper as _update_wrapper
-from .core import signature, POS_ONLY, POS_KW, VAR_KW, VAR
+from .core import signature, _digest, VAR
 
 
 class _Defaults:
@@ -11,10 +11,9 @@ class _Defaults:
         self.__name__ = getattr(func, '__name__', None)
 
         _update_wrapper(self, func)
-        sig = signature(func)
-        ps = sig.parameters
-        self.posargs = [k for k in ps if ps[k].kind in (POS_ONLY, POS_KW)]
-        self.varkw = varkw and any(p.kind == VAR_KW for p in ps.values())
+        d = _digest(func)
+        self.posargs = list(d.pos_names)
+        self.varkw = varkw and d.varkw
         self.strict = strict
 
         if func.__kwdefaults__ is None:
@@ -107,8 +106,8 @@ def update_defaults(func, **update):
 
         assert starstar.get_defaults(abc) == {'a': 5, 'b': 7}
     '''
-    sig = signature(func)
-    ps = sig.parameters
+    d = _digest(func)
+    sig, ps = d.sig, d.sig.parameters
 
     # update signature (do this before we pop)
     if set(ps) & set(update):
@@ -118,7 +117,7 @@ def update_defaults(func, **update):
         ])
 
     # update pos/poskw
-    posargs = [k for k in ps if ps[k].kind in (POS_ONLY, POS_KW)]
+    posargs = d.pos_names
     if func.__defaults__ and set(posargs) & set(update):
         func.__defaults__ = tuple(
             update.pop(name, current)
@@ -146,5 +145,6 @@ def get_defaults(func):
 
         assert starstar.get_defaults(abc) == {'a': 5, 'b': 6}
     '''
-    ps = ((k, p.default) for k, p in signature(func).parameters.items() if p.kind not in VAR)
-    return {k: d for k, d in ps if d is not inspect._empty}
+    return {
+        p.name: p.default for p in _digest(func).params
+        if p.kind not in VAR and p.default is not inspect._empty}
@@ -15,6 +15,15 @@ def parse(value):
         assert ssparse('{a:5}') == {'a': 5}
         assert ssparse('{a:[1,2,3]}') == {'a': [1, 2, 3]}
     """
+    # fast paths for the common simple values - these give the same result as _literal_eval
+    if value in _BUILTIN_VALUES:
+        return _BUILTIN_VALUES[value]
+    if value.isidentifier():  # bare words are kept as strings
+        return value
+    digits = value[1:] if value[:1] == '-' else value
+    if digits.isascii() and digits.isdigit() and (digits[0] != '0' or digits == '0'):
+        return int(value)
+
     try:
         return _literal_eval(value)
     except (SyntaxError, ValueError):
@@ -26,24 +35,16 @@ def _literal_eval(value):
     if isinstance(root.body, ast.BinOp):  # pytype: disable=attribute-error
         raise ValueError(value)
 
-    for node in ast.walk(root):
-        for field, child in ast.iter_fields(node):
-            if isinstance(child, list):
-                for index, subchild in enumerate(child):
-                    if isinstance(subchild, ast.Name):
-                        child[index] = _replacement(subchild)
-            elif isinstance(child, ast.Name):
-                node.__setattr__(field, _replacement(child))
-
     # supports: strings, bytes, numbers, tuples, lists, dicts, sets, booleans, and None
-    return ast.literal_eval(root)
+    return ast.literal_eval(_NamesToStrings().visit(root))
 
 
 _BUILTIN = ('True', 'False', 'None')  # TODO: '...'
-def _replacement(node):
-  """Returns a node to use in place of the supplied node in the AST."""
-  value = node.id
-  return node if value in _BUILTIN else ast.Str(value)
+_BUILTIN_VALUES = {'True': True, 'False': False, 'None': None}
+class _NamesToStrings(ast.NodeTransformer):
+  """Replaces bare names (e.g. ``asdf``) in the AST with strings."""
+  def visit_Name(self, node):
+    return node if node.id in _BUILTIN else ast.copy_location(ast.Constant(node.id), node)
 
 
 if __name__ == '__main__':
@@ -229,6 +229,42 @@ def unpack(data=None, *pos_defaults, _up_=0, _default_None_=True, _cached_assign
     return _unpack(data, keys, pos_defaults, defaults, default_None=_default_None_)
 
 
+_MISSING = object()
+
+def _compile_unpack(*keys, _default_None_=True, **defaults):
+    '''Build a reusable dict unpacker for a fixed set of keys. Available as ``unpack.compile``.
+
+    This skips parsing the assignment from the calling line and precomputes the keys
+    to pull out, which is useful in hot loops. A final key starting with ``*`` collects 
+    the remaining items.
+
+    .. code-block:: python
+
+        extract = starstar.unpack.compile('a', 'b', '*c', b=0)
+
+        a, b, c = extract({'a': 1, 'x': 1, 'y': 2})
+        assert (a, b, c) == (1, 0, {'x': 1, 'y': 2})
+    '''
+    rest = bool(keys) and keys[-1].startswith('*')
+    names = keys[:-1] if rest else keys
+    fallback = None if _default_None_ else _MISSING
+    pairs = tuple((k, defaults.get(k, fallback)) for k in names)
+    consumed = frozenset(names)
+
+    def extract(data):
+        values = [data[k] if k in data else d for k, d in pairs]
+        if fallback is _MISSING:
+            for (k, _), v in zip(pairs, values):
+                if v is _MISSING:
+                    raise KeyError(k)
+        if rest:
+            values.append({k: v for k, v in data.items() if k not in consumed})
+        return tuple(values)
+    return extract
+
+unpack.compile = _compile_unpack
+
+
 def _unpack(data, keys, pos_defaults, defaults, default_None=True):
     # this is where the real magic happens !!
     if isinstance(data, dict):
@@ -240,7 +276,8 @@ def _unpack(data, keys, pos_defaults, defaults, default_None=True):
                 raise ValueError(k)
             # a, b, *rest = unpack() - like: { a, b, ...rest }
             if _STAR == k[:len(_STAR)]:
-                yield {k: data[k] for k in set(data) - set(keys)}
+                skip = set(keys)
+                yield {k: v for k, v in data.items() if k not in skip}
                 return
             # normal dict get key
             yield _get_dict_fallback(
@@ -358,7 +395,7 @@ def _replacement(node, prefix=None):
         return node
     if prefix:
         value = prefix + value
-    return ast.Str(value)
+    return ast.Constant(value)
 
 
 
@@ -3,6 +3,11 @@ import argparse
 import shlex
 import starstar.argparse as ssargparse
 import pytest
+from typing import Union
+try:
+    from typing import Literal
+except ImportError:  # 3.7
+    from typing_extensions import Literal
 
 
 
@@ -37,4 +42,182 @@ def test_just_enough(parser):
 
 def test_extra_args(parser):
     args = parser.parse_args(shlex.split("1 2 3 4 -w 3 --xxx  6 --extra  12 --asdfasdfsadf '[1,2,3]'"))
-    assert vars(args) == dict(extra='12', aaa=1, bbb=2, a=[3, 4], wow=3, quoi='aaa', xxx=6, asdfasdfsadf=[1, 2, 3])
\ No newline at end of file
+    assert vars(args) == dict(extra='12', aaa=1, bbb=2, a=[3, 4], wow=3, quoi='aaa', xxx=6, asdfasdfsadf=[1, 2, 3])
+
+
+def test_cached_plan():
+    assert ssargparse._cached_type_hints(myfunction) is ssargparse._cached_type_hints(myfunction)
+    assert ssargparse._cached_docstr_parse(myfunction.__doc__, 'google') is ssargparse._cached_docstr_parse(myfunction.__doc__, 'google')
+    assert ssargparse._cached_docstr_parse(myfunction.__doc__, docstyle='google') == ssargparse._cached_docstr_parse(myfunction.__doc__, 'google')
+    p1 = ssargparse.from_func(myfunction, docstyle='google')
+    p2 = ssargparse.from_func(myfunction, docstyle='google')
+    argv = shlex.split("1 --wow 3")
+    assert vars(p1.parse_args(argv)) == vars(p2.parse_args(argv))
+
+
+@pytest.mark.parametrize('annotation,expected', [
+    ('int', 'int'),
+    ('dict[str, int]', 'dict[str, int]'),
+    ('int | str', 'Union[int,str]'),
+    ('int | str, float | None', 'Union[int,str],Union[float,None]'),
+    ('dict[str | int, str]', 'dict[Union[str,int],str]'),
+    ('List[int]|None', 'Union[List[int],None]'),
+    ('value | dict[str | int, list[int | str]]', 'Union[value,dict[Union[str,int],list[Union[int,str]]]]'),
+    ('Callable[[int|str], int]', 'Callable[[Union[int,str]],int]'),
+    ("Literal['a|b', 'c'] | None", "Union[Literal['a|b','c'],None]"),
+    ('  int|str  ', 'Union[int,str]'),
+    ('dict[ str ,  list[ int |  None ] ]', 'dict[str,list[Union[int,None]]]'),
+    ('dict[str, int | None', 'dict[str, int | None'),  # unbalanced - left alone
+])
+def test_repl_union(annotation, expected):
+    assert ssargparse._repl_union(annotation) == expected
+
+
+def test_type_checker_cached():
+    check = ssargparse._parse_type_checker(int)
+    assert check is ssargparse._parse_type_checker(int)
+    assert check('5') == 5
+
+    check = ssargparse._parse_type_checker(Union[int, list])
+    assert check.__name__ == 'int|list'
+    assert check('5') == 5
+    assert check('[1,2]') == [1, 2]
+    assert ssargparse._type_casters(Union[int, list, None]) == (int, list, type(None))
+    check = ssargparse._parse_type_checker(Union[int, float])
+    with pytest.raises(TypeError):
+        check('abc')
+
+
+def test_varkw_args(parser):
+    args = parser.parse_args(shlex.split("1 --wow 3 --some-flag --many '[1,2,abc]' --eq=[1,2] --neg -5"))
+    assert vars(args) == dict(
+        extra=5, aaa=1, bbb=5, a=[], wow=3, quoi='aaa', 
+        some_flag=True, many=[1, 2, 'abc'], eq=[1, 2], neg=-5)
+
+
+def test_varkw_args_before_positionals():
+    def func(path, *rest, **kw): pass
+    parser = ssargparse.from_func(func)
+    args = parser.parse_args(shlex.split("--name bob data.csv"))
+    assert vars(args) == dict(path='data.csv', rest=[], name='bob')
+    args = parser.parse_args(shlex.split("data.csv more --name bob --flag"))
+    assert vars(args) == dict(path='data.csv', rest=['more'], name='bob', flag=True)
+    # the discovered flags aren't left on the parser
+    assert vars(parser.parse_args(shlex.split("data.csv"))) == dict(path='data.csv', rest=[])
+    assert vars(parser.parse_args(shlex.split("data.csv --name"))) == dict(path='data.csv', rest=[], name=True)
+    # repeated flags - the last one wins
+    assert vars(parser.parse_args(shlex.split("--a 1 --a 2 x"))) == dict(path='x', rest=[], a=2)
+    # a flag takes one value, the rest are positional
+    args = parser.parse_args(shlex.split("--many 1 2 data.csv"))
+    assert vars(args) == dict(path=2, rest=['data.csv'], many=1)
+    # ... and none of the discovered flags are left on the parser
+    assert not any(a.dest in ('many', 'name', 'a') for a in parser._actions)
+
+
+def test_classify():
+    assert ssargparse._classify(int) == (False, ())
+    assert ssargparse._classify(Union[int, str]) == (True, (int, str))
+    assert ssargparse._lenient_subclass(Union[bool, None], bool)
+    assert not ssargparse._lenient_subclass(Union[int, list], (list, tuple))
+    assert ssargparse._lenient_subclass(Union[int, list], (list, tuple), any)
+
+
+def test_literal_choices():
+    def func(mode: Literal['a', 'b']='a'): pass
+    parser = ssargparse.from_func(func)
+    assert vars(parser.parse_args(shlex.split("--mode b"))) == dict(mode='b')
+    with pytest.raises(SystemExit):
+        parser.parse_args(shlex.split("--mode c"))
+    action = next(a for a in parser._actions if a.dest == 'mode')
+    assert tuple(action.choices) == ('a', 'b')
+
+
+def test_help(parser):
+    helps = {a.dest: a.help for a in parser._actions}
+    assert helps['aaa'] == 'first'
+    assert helps['wow'] == 'ok cool'
+    assert helps['bbb'] is None  # documented as "bbbb"
+    assert parser.description.startswith('Look at my function')
+
+
+def test_live_annotations():
+    exec_globals = {}
+    exec('def func(a: int=1, b: bool=False): pass', exec_globals)  # no __future__ annotations
+    parser = ssargparse.from_func(exec_globals['func'])
+    assert vars(parser.parse_args(shlex.split("--a 2 --b"))) == dict(a=2, b=True)
+
+
+def test_from_func_fast(capsys):
+    def simple(*, lr: float=1e-3, n: int, name='model'):
+        '''Simple function
+        
+        Arguments:
+            lr (float): learning rate
+        '''
+
+    parser = ssargparse.from_func_fast(simple)
+    assert isinstance(parser, ssargparse.FastParser)
+    assert vars(parser.parse_args(shlex.split("--n 2"))) == dict(lr=1e-3, n=2, name='model')
+    assert vars(parser.parse_args(shlex.split("--lr=0.1 --n 2 --name '[1,2]'"))) == dict(lr=0.1, n=2, name=[1, 2])
+    # falls back to argparse for help/errors
+    assert parser._parser is None
+    with pytest.raises(SystemExit):
+        parser.parse_args(shlex.split("--lr 0.1"))  # missing n
+    with pytest.raises(SystemExit):
+        parser.parse_args(shlex.split("--n 2 --xxx 5"))
+    with pytest.raises(SystemExit):
+        parser.parse_args(shlex.split("--help"))
+    assert 'learning rate' in capsys.readouterr().out
+    # argparse abbreviations
+    assert vars(parser.parse_args(shlex.split("-n 2"))) == dict(lr=1e-3, n=2, name='model')
+    # only the flags that from_func would accept
+    def snake(*, my_name='a'): pass
+    parser = ssargparse.from_func_fast(snake)
+    assert vars(parser.parse_args(shlex.split("--my-name b"))) == dict(my_name='b')
+    with pytest.raises(SystemExit):
+        parser.parse_args(shlex.split("--my_name b"))
+    # the rest of the parser interface comes from the full parser
+    assert '--my-name' in parser.format_help()
+
+    # not simple enough, use a regular parser
+    assert isinstance(ssargparse.from_func_fast(myfunction), ssargparse.ArgumentParser)
+
+
+class Custom(str):
+    pass
+
+def test_module_annotations():
+    def func(a: Custom | None = None): pass
+    hints = ssargparse._cached_type_hints(func)
+    assert hints['a'] == Union[Custom, None]
+
+
+def test_lazy_docstr():
+    import subprocess, sys
+    code = 'import sys, starstar.argparse as a; assert "starstar.docstr" not in sys.modules; a.docstr; assert "starstar.docstr" in sys.modules'
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_from_any_lazy():
+    def add(x: int, y: int=1):
+        '''Add two numbers.'''
+        return x + y
+    def sub(x: int, y: int=1):
+        return x - y
+    parser = ssargparse.from_any({'add': add, 'more: other commands': {'sub': sub}})
+    subs = parser._subparsers._group_actions[0]._name_parser_map
+    assert subs['add']._lazy is not None and subs['more']._lazy is not None
+    assert 'Add two numbers.' in parser.format_help()
+    assert 'other commands' in parser.format_help()
+
+    args = parser.parse_args(shlex.split('add --x 2 --y 3'))
+    assert subs['add']._lazy is None and subs['more']._lazy is not None
+    assert ssargparse.call_any(parser, vars(args)) == 5
+
+    args = parser.parse_args(shlex.split('more sub --x 2'))
+    assert ssargparse.call_any(parser, vars(args)) == 1
+
+    # plain argparse parsers are built eagerly
+    parser = ssargparse.from_any({'add': add}, parser=argparse.ArgumentParser())
+    args = parser.parse_args(shlex.split('add --x 2'))
+    assert ssargparse.call_any(parser, vars(args)) == 3
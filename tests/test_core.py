@@ -38,6 +38,16 @@ def test_divide():
     assert starstar.divide(kwx, b2, c2, varkw=False, mode='ignore') == [{'a': 'a'}, {'e': 'e'}]
     assert starstar.divide(kwx, b2, c2, mode='separate') == [{'a': 'a', 'zzz': 'zzz'}, {'e': 'e', 'zzz': 'zzz'}, {}]
 
+    # nested groups of functions
+    def d(g=None):
+        return 'd', g
+    kw = dict(a='a', e='e', g='g')
+    assert starstar.divide(kw, (b, (c,)), d) == [{'a': 'a', 'e': 'e'}, {'g': 'g'}]
+
+    # keys keep the caller's order
+    kw = dict(c='c', b='b', a='a', e='e', f='f', d='d')
+    assert [list(x) for x in starstar.divide(kw, b, c)] == [['c', 'b', 'a'], ['c', 'e', 'f', 'd']]
+
 
 def test_signature():
     def b(a=None, b=None, c=None):
@@ -52,6 +62,14 @@ def test_signature():
     # assert starstar.signature(sssig) is sssig
 
 
+def test_signature_uncacheable():
+    assert list(starstar.signature(float).parameters) == ['x']
+    assert list(starstar.signature(len).parameters) == ['obj']
+    assert type(len) in starstar.core._NO_SIG_CACHE
+    assert type not in starstar.core._NO_SIG_CACHE
+    assert list(starstar.signature(len).parameters) == ['obj']
+
+
 def test_core():
     def b(a=None, b=None, c=None):
         return 'b', a, b, c
@@ -326,6 +344,69 @@ def test_as_akw():
     assert kw == {'d': 4}
 
 
+def test_digest():
+    def func_a(a, b, *xs, c=1, **kw): 
+        pass
+
+    d = starstar.core._digest(func_a)
+    assert d is starstar.core._digest(func_a)
+    assert d.kw_names == {'a', 'b', 'c'}
+    assert d.pos_names == ('a', 'b')
+    assert d.var_pos == 'xs' and d.varkw
+
+    # wrappers copy the cached digest, but it's recomputed for the new signature
+    @starstar.wraps(func_a)
+    def func_b(*a, x=0, **kw):
+        pass
+    assert starstar.core._digest(func_b).kw_names == {'a', 'b', 'c', 'x'}
+
+    func_a.__signature__ = starstar.signature(lambda y: None)
+    assert starstar.core._digest(func_a).kw_names == {'y'}
+
+    # groups are cached on their functions' signatures
+    d = starstar.core._digest([func_a, (func_b,)])
+    assert d is starstar.core._digest((func_a, [func_b]))
+    assert d.kw_names == {'a', 'b', 'c', 'x', 'y'}
+    func_a.__signature__ = starstar.signature(lambda z: None)
+    assert starstar.core._digest([func_a, (func_b,)]).kw_names == {'a', 'b', 'c', 'x', 'z'}
+
+
+def test_traceto_cache():
+    def func_a(a=1, b=2): pass
+
+    @starstar.traceto(func_a)
+    def func_b(**kw): pass
+    @starstar.traceto(func_a)
+    def func_c(**kw): pass
+    pb, pc = starstar.signature(func_b).parameters, starstar.signature(func_c).parameters
+    assert list(pb) == list(pc) == ['a', 'b']
+    assert pb['a'] is pc['a']
+
+    func_a.__signature__ = starstar.signature(lambda x=1: None)
+    @starstar.traceto(func_a)
+    def func_d(**kw): pass
+    assert list(starstar.signature(func_d).parameters) == ['x']
+
+    # grouped functions are cached too
+    def func_e(c=3): pass
+    fs = [starstar.traceto((func_a, func_e))(lambda **kw: None) for _ in range(3)]
+    assert [list(starstar.signature(f).parameters) for f in fs] == [['x', 'c']] * 3
+    ps = [starstar.signature(f).parameters['c'] for f in fs]
+    assert ps[0] is ps[1] is ps[2]
+
+
+def test_partial():
+    def func(a, b, c=3, *, d=4):
+        return a, b, c, d
+
+    f = starstar.partial(func, 1)
+    assert f(2) == (1, 2, 3, 4)
+    assert [p.name for p in starstar.signature(f).parameters.values()] == ['b', 'c', 'd']
+    f = starstar.partial(func, 1, d=5)
+    assert f(2) == (1, 2, 3, 5)
+    assert f(2, d=6) == (1, 2, 3, 6)
+
+
 def test_kw_filtering():
     def func_a(a, b, c): 
         return a+b+c
@@ -336,6 +417,7 @@ def test_kw_filtering():
     assert starstar.filter_kw(func_a, kw, unmatched=True) == {'a'}
     assert starstar.filter_kw(func_a, kw, unmatched=True, inverse=True) == {'x', 'y'}
     assert starstar.filter_kw(lambda b, **kw: kw, kw) == kw
+    assert list(starstar.filter_kw(func_a, dict(c=3, x=1, b=2, a=1))) == ['c', 'b', 'a']
 
     func_a1 = starstar.filtered(func_a)
     func_a1(1, 2, c=3, x=1, y=2)  # just gonna ignore x and y
@@ -365,4 +447,10 @@ def test_get_args():
 def test_kw2id():
     kw = {'name': 'asdf', 'count': 10, 'enabled': True}
     assert starstar.kw2id(kw, 'name', 'count', 'enabled', 'xxx') == 'name_asdf-count_10-enabled_True'
-    assert starstar.kw2id(kw, 'name', 'xxx', 'count', filter=False) == 'name_asdf-xxx_-count_10'
\ No newline at end of file
+    assert starstar.kw2id(kw, 'name', 'xxx', 'count', filter=False) == 'name_asdf-xxx_-count_10'
+
+def test_lazy_nestdoc():
+    import sys
+    import subprocess
+    code = 'import sys, starstar; assert "docstring_parser" not in sys.modules; starstar.nestdoc; assert "docstring_parser" in sys.modules'
+    subprocess.run([sys.executable, '-c', code], check=True)
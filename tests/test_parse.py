@@ -0,0 +1,15 @@
+import pytest
+from starstar.parse import parse, _literal_eval
+
+
+@pytest.mark.parametrize('value', [
+    '5', '-5', '0', '05', '-0', '1_000', '5.5', '-', '', ' 5', 'True', 'None', 'False',
+    'asdf', 'if', 'lambda', '[1,2,asdf]', '{a:[1,2,3]}', '(1,)', '"quoted"', '1+2', 'a b',
+])
+def test_parse_fast_path(value):
+    try:
+        expected = _literal_eval(value)
+    except (SyntaxError, ValueError):
+        expected = value
+    assert parse(value) == expected
+    assert type(parse(value)) is type(expected)
@@ -1,3 +1,4 @@
+import pytest
 import starstar
 
 
@@ -89,4 +90,17 @@ def test_assignto():
 
         (x, y, (z, q, w))
     ) = starstar.assignedto()
-    assert (a, b, w, x, y, z, q) == ('a', 'b', 'w', 'x', 'y', 'z', 'q')
\ No newline at end of file
+    assert (a, b, w, x, y, z, q) == ('a', 'b', 'w', 'x', 'y', 'z', 'q')
+
+def test_unpack_compile():
+    data = {'a': 5, 'b': 6, 'x': 0, 'y': 1, 'z': 2}
+
+    extract = starstar.unpack.compile('a', 'b', 'q', q=10)
+    assert extract(data) == (5, 6, 10)
+
+    extract = starstar.unpack.compile('a', 'c', '*rest')
+    assert extract(data) == (5, None, {'b': 6, 'x': 0, 'y': 1, 'z': 2})
+
+    extract = starstar.unpack.compile('a', 'c', _default_None_=False)
+    with pytest.raises(KeyError):
+        extract(data)